@@ -85,6 +85,115 @@ output_df = pd.DataFrame({
 
 print(output_df)
 --------------------------------------------------------
+#with a trie over aa: one left-to-right walk per path
+
+# Each node maps a segment to the next node; node[None] is the aa entry
+# ending there. A path is walked segment by segment from the left, so a
+# lookup costs its number of segments whatever the size of aa, and no
+# prefix substrings are built along the way.
+def build_trie(catalog):
+    root = {}
+    for path in catalog:
+        node = root
+        for seg in path.split('.'):
+            node = node.setdefault(seg, {})
+        node[None] = path
+    return root
+
+
+def ancestors(trie, s):
+    # Every aa entry s starts with (segment-wise), shortest first.
+    found = []
+    node = trie
+    for seg in s.split('.'):
+        node = node.get(seg)
+        if node is None:
+            break
+        if None in node:
+            found.append(node[None])
+    return found
+
+
+def longest_ancestor(trie, s):
+    # Same answer as parsestr above: the longest aa entry s starts with.
+    match = None
+    node = trie
+    for seg in s.split('.'):
+        node = node.get(seg)
+        if node is None:
+            break
+        match = node.get(None, match)
+    return match
+
+
+def resolve(trie, paths, all_matches=False):
+    # Batch version for bb-sized inputs: the job prefix ('t01.') is dropped
+    # and each distinct remainder is only walked once.
+    find = ancestors if all_matches else longest_ancestor
+    seen = {}
+    out = []
+    for path in paths:
+        k = path.split('.', 1)[-1]
+        match = seen.get(k, seen)
+        if match is seen:
+            match = seen[k] = find(trie, k)
+        out.append(match)
+    return out
+
+
+trie = build_trie(aa)
+res = {m for m in resolve(trie, bb) if m is not None}
+print(res)
+print(resolve(trie, bb, all_matches=True))
+--------------------------------------------------------
+#batch version of the pandas loop above
+import pandas as pd
+
+# Same prefix/item/matched columns for a list, array or Series of paths.
+# The aa entries are matched against the path minus its job prefix ('t01.');
+# the loop above checks the full item, job prefix included, so it never
+# finds anything. Jobs under the same parent share its ancestors, so each
+# distinct parent path is resolved once (memo) and a job only adds itself
+# if it is in aa. matched is longest first, as the loop appends them, and
+# each row gets a list of its own.
+# pandas .str split/join over the paths was tried first and ran slower than
+# this loop: object strings are processed one at a time either way.
+def match_paths(paths, catalog):
+    catalog = set(catalog)
+    index = paths.index if isinstance(paths, pd.Series) else None
+    paths = list(paths)
+    memo = {'': ()}
+
+    def ancestors(s):
+        m = memo.get(s, memo)
+        if m is memo:
+            m = ancestors(s.rpartition('.')[0])
+            if s in catalog:
+                m = (s,) + m
+            memo[s] = m
+        return m
+
+    prefixes = []
+    matches = []
+    for item in paths:
+        prefix, dot, rest = item.partition('.')
+        prefixes.append(prefix)
+        if not dot:
+            matches.append(None)
+            continue
+        matched = list(ancestors(rest.rpartition('.')[0]))
+        if rest in catalog:
+            matched.insert(0, rest)
+        matches.append(matched or None)
+    return pd.DataFrame({
+        'prefix': prefixes,
+        'item': paths,
+        'matched': matches
+    }, index=index)
+
+
+print(match_paths(bb, aa))
+--------------------------------------------------------
 Is all db_name available in autosys_instance csv file are always available in db.csv file
 If yes then is db.csv will always have server-> no then from where server info present of instance db_name
 Is it possible db.csv can have autosys_instance server
@@ -0,0 +1,359 @@
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice, repeat
+from zlib import crc32
+
+aa = ['am', 'am.hello', 'abc.hello.am', 'am.hello.aa.tt', 'am.hello.aa.tt.ags']
+bb = ['t01.am.test.box', 't01.am.hello.box', 't01.am.hello.hello.box', 't01.abc.hello.am.tt.box', 't02.am.hello.aa.tt.ags.empty', 't02.am.hello.aa.tt.ags.empty.am']
+
+# File layout: header, offsets (count + 1 uint64, entry i is
+# blob[offsets[i]:offsets[i + 1]]), hash table (slots uint32 holding entry
+# index + 1, 0 for empty, open addressing on crc32), then the UTF-8 blob.
+_MAGIC = b'CATIDX01'
+_HEADER = struct.Struct('<8sQQQ')  # magic, count, slots, blob length
+
+
+def build_index(entries):
+    """Serialize a catalog (iterable of dotted paths) into index bytes."""
+    encoded = list(dict.fromkeys(e.encode() for e in entries))
+    count = len(encoded)
+    slots = 8
+    while slots < 2 * count:
+        slots *= 2
+    mask = slots - 1
+    offsets = memoryview(bytearray(8 * (count + 1))).cast('Q')
+    table = memoryview(bytearray(4 * slots)).cast('I')
+    pos = 0
+    for i, e in enumerate(encoded):
+        offsets[i] = pos
+        pos += len(e)
+        slot = crc32(e) & mask
+        while table[slot]:
+            slot = (slot + 1) & mask
+        table[slot] = i + 1
+    offsets[count] = pos
+    header = _HEADER.pack(_MAGIC, count, slots, pos)
+    return b''.join([header, offsets.tobytes(), table.tobytes()] + encoded)
+
+
+def write_index(entries, path):
+    # Written next to path and renamed over it, so a reader never maps a
+    # half-written index. Any change log for the old index goes with it.
+    path = os.fspath(path)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as fp:
+        fp.write(build_index(entries))
+    os.replace(tmp, path)
+    _remove_if_exists(path + '.log')
+
+
+def _read_log(path):
+    try:
+        fp = open(path + '.log', encoding='utf-8', newline='\n')
+    except FileNotFoundError:
+        return
+    with fp:
+        for line in fp:
+            # A last line without its newline was cut short by a crash in
+            # the middle of an append, so it isn't a change.
+            if line.endswith('\n') and line[0] in '+-':
+                yield line[0], line[1:-1]
+
+
+def _remove_if_exists(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@contextmanager
+def _locked(path, shared=False):
+    # One writer at a time per index, across processes: appends to the log
+    # and compaction hold it exclusively. open() holds it shared, so it never
+    # maps a compacted index while the log it replaced is still there.
+    with open(path + '.lock', 'a') as fp:
+        fcntl.flock(fp, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fp, fcntl.LOCK_UN)
+
+
+def _trim_log(log):
+    # Cuts a torn last line off before appending, or the next change would
+    # be glued onto it and read back as one bogus entry.
+    try:
+        fp = open(log, 'rb+')
+    except FileNotFoundError:
+        return
+    with fp:
+        if fp.seek(0, 2) == 0:
+            return
+        fp.seek(-1, 2)
+        if fp.read(1) != b'\n':
+            fp.seek(0)
+            fp.truncate(fp.read().rfind(b'\n') + 1)
+
+
+class CatalogIndex:
+    """View of an index built by build_index.
+
+    Works over any buffer (bytes, an mmap of an index file), so processes
+    that map the same file share one copy of the catalog in the page cache.
+
+    An index opened from a file can be updated in place: add() and remove()
+    append to a change log next to it (path + '.log') that open() replays,
+    and compact() folds the log back into the index file. Each process sees
+    the file and log as they were when it opened them, plus its own changes.
+    """
+
+    def __init__(self, buf):
+        self.path = None
+        self._added = set()
+        self._removed = set()
+        self._load(buf)
+
+    def _load(self, buf):
+        magic, count, slots, blob_len = _HEADER.unpack_from(buf)
+        if magic != _MAGIC:
+            raise ValueError("not a catalog index")
+        view = memoryview(buf)
+        start = _HEADER.size
+        self.offsets = view[start:start + 8 * (count + 1)].cast('Q')
+        start += 8 * (count + 1)
+        self.table = view[start:start + 4 * slots].cast('I')
+        start += 4 * slots
+        self.blob = view[start:start + blob_len]
+        self.count = count
+        self.mask = slots - 1
+        self._net = len(self._added) - len(self._removed)
+        self._ops = 0
+
+    @classmethod
+    def open(cls, path):
+        path = os.fspath(path)
+        with _locked(path, shared=True):
+            return cls._open(path)
+
+    @classmethod
+    def _open(cls, path):
+        # Caller holds the lock.
+        with open(path, 'rb') as fp:
+            buf = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        index = cls(buf)
+        index._mmap = buf
+        index.path = path
+        for op, entry in _read_log(path):
+            index._apply(op, entry)
+            index._ops += 1
+        return index
+
+    def __len__(self):
+        return self.count + self._net
+
+    def _apply(self, op, entry):
+        if op == '+':
+            self._removed.discard(entry)
+            if not self._find(entry.encode()):
+                self._added.add(entry)
+        else:
+            self._added.discard(entry)
+            if self._find(entry.encode()):
+                self._removed.add(entry)
+        self._net = len(self._added) - len(self._removed)
+
+    def _log(self, op, entries):
+        if self.path is None:
+            raise ValueError("only an index opened from a file can be updated")
+        lines = []
+        for entry in entries:
+            if '\n' in entry:
+                raise ValueError("catalog entries can't contain newlines")
+            self._apply(op, entry)
+            lines.append(op + entry + '\n')
+        log = self.path + '.log'
+        with _locked(self.path):
+            _trim_log(log)
+            with open(log, 'ab') as fp:
+                fp.write(''.join(lines).encode())
+            self._ops += len(lines)
+            # Past a quarter of the index, replaying the log on every open
+            # costs more than rewriting the file once.
+            if self._ops > self.count // 4 + 1024:
+                self._compact()
+
+    def add(self, entries):
+        self._log('+', entries)
+
+    def remove(self, entries):
+        self._log('-', entries)
+
+    def compact(self):
+        """Rewrite the index file with the logged changes applied.
+
+        Rebuilt from the file and log on disk, not from this handle's view,
+        so changes other processes logged since it opened are kept; this
+        handle then sees them too.
+        """
+        if self.path is None:
+            raise ValueError("only an index opened from a file can be compacted")
+        with _locked(self.path):
+            self._compact()
+
+    def _compact(self):
+        path = self.path
+        self.close()
+        current = CatalogIndex._open(path)
+        try:
+            entries = list(current)
+        finally:
+            current.close()
+        write_index(entries, path)
+        with open(path, 'rb') as fp:
+            buf = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mmap = buf
+        self._added = set()
+        self._removed = set()
+        self._load(buf)
+
+    def _find(self, key):
+        table, offsets, blob, mask = self.table, self.offsets, self.blob, self.mask
+        slot = crc32(key) & mask
+        while True:
+            i = table[slot]
+            if not i:
+                return False
+            if blob[offsets[i - 1]:offsets[i]] == key:
+                return True
+            slot = (slot + 1) & mask
+
+    def _has(self, path):
+        if path in self._added:
+            return True
+        if path in self._removed:
+            return False
+        return self._find(path.encode())
+
+    def __contains__(self, path):
+        return self._has(path)
+
+    def ancestors(self, path):
+        # Registered paths that path starts with (segment-wise), shortest
+        # first, path itself included.
+        found = []
+        end = path.find('.')
+        while end != -1:
+            prefix = path[:end]
+            if self._has(prefix):
+                found.append(prefix)
+            end = path.find('.', end + 1)
+        if path and self._has(path):
+            found.append(path)
+        return found
+
+    def longest_ancestor(self, path):
+        # parsestr's answer: drop trailing segments until a registered path.
+        while path:
+            if self._has(path):
+                return path
+            end = path.rfind('.')
+            if end == -1:
+                return None
+            path = path[:end]
+        return None
+
+    def __iter__(self):
+        offsets, blob, removed = self.offsets, self.blob, self._removed
+        for i in range(self.count):
+            entry = bytes(blob[offsets[i]:offsets[i + 1]]).decode()
+            if entry not in removed:
+                yield entry
+        yield from self._added
+
+    def close(self):
+        # Views have to go before the mmap they point into can be closed.
+        self.offsets.release()
+        self.table.release()
+        self.blob.release()
+        mm = getattr(self, '_mmap', None)
+        if mm is not None:
+            mm.close()
+            self._mmap = None
+
+
+def _match(index, paths, all_matches):
+    # Job prefix ('t01.') dropped, as in Recursion_example.
+    find = index.ancestors if all_matches else index.longest_ancestor
+    out = []
+    for path in paths:
+        rest = path.split('.', 1)[-1]
+        out.append(find(rest))
+    return out
+
+
+_worker_index = None
+
+
+def _open_worker_index(path):
+    global _worker_index
+    _worker_index = CatalogIndex.open(path)
+
+
+def _match_chunk(paths, all_matches):
+    return _match(_worker_index, paths, all_matches)
+
+
+def _chunks(paths, size):
+    it = iter(paths)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def resolve(paths, catalog, workers=None, chunk_size=10_000, all_matches=False):
+    """Match job paths against the catalog, one result per path in order.
+
+    catalog is an index file path or an iterable of entries (written to a
+    temporary index file first). Each worker maps the file once when it
+    starts, so tasks only carry their paths, never the catalog.
+    all_matches=True gives every ancestor instead of the longest one.
+    """
+    tmp = None
+    if isinstance(catalog, (str, os.PathLike)):
+        path = catalog
+    else:
+        fd, tmp = tempfile.mkstemp(suffix='.catidx')
+        os.close(fd)
+        write_index(catalog, tmp)
+        path = tmp
+    try:
+        if workers == 1:
+            index = CatalogIndex.open(path)
+            try:
+                return _match(index, paths, all_matches)
+            finally:
+                index.close()
+        out = []
+        with ProcessPoolExecutor(workers, initializer=_open_worker_index, initargs=(path,)) as pool:
+            chunks = _chunks(paths, chunk_size)
+            for matches in pool.map(_match_chunk, chunks, repeat(all_matches)):
+                out.extend(matches)
+        return out
+    finally:
+        if tmp is not None:
+            os.remove(tmp)
+            _remove_if_exists(tmp + '.lock')
+
+
+if __name__ == "__main__":
+    res = {m for m in resolve(bb, aa, workers=2) if m is not None}
+    print(res)
+    print(resolve(bb, aa, workers=2, all_matches=True))
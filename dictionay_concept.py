@@ -77,6 +77,53 @@ print(result)
     ]
 }
 
+----------------------------------------------------------------------------------------------------------
+#one pass: app_key -> port -> ips hash index
+from operator import itemgetter
+
+D1 = {'1414': [1, 2], '1413': [3, 4]}
+D2 = {1: 'app_id', '2': 'appid', 3: 'app_id', 4: 'app_id'}
+
+
+def group_ports(D1, D2, sort=False):
+    # Each (port, ip) pair is looked at once. A port's group dict goes into
+    # the output the first time it is seen and its ips list is filled in
+    # place, so there's no second pass; ips with no app in D2 are skipped.
+    # Two D1 keys for the same port ('1414', '01414') share a group.
+    # sort=True orders ports and ips like the sorted version above.
+    index = {}
+    output = {}
+    get_app = D2.get
+    for key, ips in D1.items():
+        port = int(key)
+        groups = {}
+        for ip in ips:
+            app_key = get_app(ip)
+            if not app_key:
+                continue
+            group = groups.get(app_key)
+            if group is None:
+                ports = index.get(app_key)
+                if ports is None:
+                    ports = index[app_key] = {}
+                    output[app_key] = []
+                group = ports.get(port)
+                if group is None:
+                    group = ports[port] = []
+                    output[app_key].append({'port': port, 'ips': group})
+                groups[app_key] = group
+            group.append(ip)
+    if sort:
+        for groups in output.values():
+            groups.sort(key=itemgetter('port'))
+            for group in groups:
+                group['ips'].sort()
+    return output
+
+
+print(group_ports(D1, D2))
+print(group_ports(D1, D2, sort=True))
+
 ----------------------------------------------------------------------------------------------------------
 1st way
 aa= {'egress': defaultdict(list), 'ingress': defaultdict(list)}
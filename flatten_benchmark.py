@@ -0,0 +1,522 @@
+import ast
+import importlib.util
+import itertools
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import normalize_dictionary_with_missing_keys
+from key_paths import PathCache
+from parse_dictionary import Columns, Solution, list_, spill_rows
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def leaves(val):
+    # Scalar values written into rows, counted the way the flattener visits them.
+    if isinstance(val, list) and val and isinstance(val[0], dict):
+        return sum(leaves(rec) for rec in val)
+    if isinstance(val, dict):
+        return sum(leaves(v) for v in val.values())
+    return 1
+
+
+def scaled_list(target_leaves):
+    per_copy = sum(leaves(rec) for rec in list_)
+    return list_ * (target_leaves // per_copy or 1)
+
+
+def distinct_list(target_rows):
+    # list_ copies with a unique Name each, so no row is a duplicate of another.
+    sol = Solution()
+    per_copy = list(sol.iter_rows(list_))
+    copies = target_rows // len(per_copy) or 1
+    return [dict(rec, Name=f"{rec['Name']} {n}") for n in range(copies) for rec in list_]
+
+
+def deep_doc(depth):
+    doc = {'subject': 'leaf'}
+    for _ in range(depth):
+        doc = {'k': [doc, {'subject': 'sibling'}]}
+    return doc
+
+
+def best_of(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_engines(target_leaves=1_000_000):
+    sol = Solution()
+    data = scaled_list(target_leaves)
+    rec_out = []
+    sol._recursive_parse_data(data, {}, rec_out)
+    assert rec_out == list(sol.iter_rows(data))
+
+    # The plain iterative walk runs about 0.8-0.9x the recursive one here:
+    # list_ repeated has a dozen distinct rows, so `dict_ not in out` stays
+    # cheap, while the explicit stack costs more per record than a Python
+    # call (inlined since 3.11). That is the price of no recursion limit
+    # and of dedup staying linear (bench_dedup_scaling); plan=True is the
+    # fast path for homogeneous records like these.
+    rec = best_of(lambda: sol._recursive_parse_data(data, {}, []))
+    it = best_of(lambda: list(sol.iter_rows(data)))
+    planned = best_of(lambda: list(sol.iter_rows(data, plan=True)))
+    print(f"{len(data)} records / {target_leaves} leaves")
+    print(f"  recursive : {rec:.3f}s")
+    print(f"  iterative : {it:.3f}s ({rec / it:.2f}x)")
+    print(f"  planned   : {planned:.3f}s ({rec / planned:.2f}x)")
+
+
+def bench_depth(depth=2000):
+    sol = Solution()
+    doc = deep_doc(depth)
+    try:
+        sol._recursive_parse_data(doc, {}, [])
+        print(f"depth {depth}: recursive ok")
+    except RecursionError:
+        print(f"depth {depth}: recursive hit RecursionError")
+    out = list(sol.iter_rows(doc))
+    print(f"depth {depth}: iterative ok, {len(out)} rows")
+
+
+def bench_dedup_scaling(sizes=(10_000, 100_000, 1_000_000), quadratic_sizes=(5_000, 10_000)):
+    sol = Solution()
+    for rows in quadratic_sizes:
+        data = distinct_list(rows)
+        elapsed = best_of(lambda: sol._recursive_parse_data(data, {}, []), repeat=1)
+        print(f"{rows:>9} rows  recursive : {elapsed:.3f}s ({elapsed / rows * 1e6:.2f} us/row)")
+    for rows in sizes:
+        data = distinct_list(rows)
+        elapsed = best_of(lambda: list(sol.iter_rows(data)), repeat=1)
+        print(f"{rows:>9} rows  iterative : {elapsed:.3f}s ({elapsed / rows * 1e6:.2f} us/row)")
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_streaming(sizes=(10_000, 100_000)):
+    sol = Solution()
+    for rows in sizes:
+        data = distinct_list(rows)
+        as_list = peak_memory(lambda: list(sol.iter_rows(data)))
+        streamed = peak_memory(lambda: sum(1 for _ in sol.iter_rows(data, cross_record_dedup=False)))
+        print(f"{rows:>9} rows  list peak : {as_list / 2**20:8.2f} MiB  streamed peak : {streamed / 2**20:8.2f} MiB")
+
+
+def bench_plan(rows=200_000):
+    sol = Solution()
+    data = distinct_list(rows)
+    plan = sol.compile_plan(data)
+    assert list(sol.iter_rows(data, plan=plan)) == list(sol.iter_rows(data))
+    for cross_record_dedup in (True, False):
+        generic = best_of(lambda: sum(1 for _ in sol.iter_rows(data, cross_record_dedup)))
+        planned = best_of(lambda: sum(1 for _ in sol.iter_rows(data, cross_record_dedup, plan=plan)))
+        print(f"{rows:>9} rows  cross_record_dedup={cross_record_dedup!s:5}  generic : {generic:.3f}s"
+              f"  planned : {planned:.3f}s ({generic / planned:.2f}x)")
+
+
+def bench_parallel(rows=400_000, chunk_size=2000):
+    sol = Solution()
+    data = distinct_list(rows)
+    serial = best_of(lambda: sum(1 for _ in sol.iter_rows(data)), repeat=1)
+    print(f"{rows:>9} rows  serial     : {serial:.3f}s")
+    for workers in sorted({1, 2, 4, os.cpu_count()}):
+        elapsed = best_of(lambda: sum(1 for _ in sol.iter_rows(data, workers=workers, chunk_size=chunk_size)), repeat=1)
+        print(f"{rows:>9} rows  workers={workers:<3}: {elapsed:.3f}s ({serial / elapsed:.2f}x)")
+
+
+def bench_columnar(rows=200_000):
+    sol = Solution()
+    data = distinct_list(rows)
+    as_rows = peak_memory(lambda: list(sol.iter_rows(data, cross_record_dedup=False)))
+    as_columns = peak_memory(lambda: Columns(sol.iter_rows(data, cross_record_dedup=False)))
+    print(f"{rows:>9} rows  list of dicts : {as_rows / 2**20:8.2f} MiB  columns : {as_columns / 2**20:8.2f} MiB"
+          f" ({as_rows / as_columns:.1f}x smaller)")
+
+
+def bench_native(target_leaves=1_000_000):
+    sol = Solution()
+    data = scaled_list(target_leaves)
+    total = sum(leaves(rec) for rec in data)
+    as_str = best_of(lambda: sum(1 for _ in sol.iter_rows(data, cross_record_dedup=False)))
+    native = best_of(lambda: sum(1 for _ in sol.iter_rows(data, cross_record_dedup=False, native=True)))
+    saved = (as_str - native) / total * 1_000_000
+    print(f"{total} leaves  str() : {as_str:.3f}s  native : {native:.3f}s"
+          f"  saving : {saved * 1000:.1f} ms per million leaves")
+
+
+def bench_json_stream(rows=100_000):
+    sol = Solution()
+    with tempfile.TemporaryFile('w+') as fp:
+        json.dump(distinct_list(rows), fp)
+
+        def load_then_flatten():
+            fp.seek(0)
+            return sum(1 for _ in sol.iter_rows(json.load(fp), cross_record_dedup=False))
+
+        def stream():
+            fp.seek(0)
+            return sum(1 for _ in sol.iter_json_rows(fp, cross_record_dedup=False))
+
+        loaded = peak_memory(load_then_flatten)
+        streamed = peak_memory(stream)
+        elapsed = best_of(stream, repeat=1)
+        print(f"{rows:>9} rows  json.load peak : {loaded / 2**20:8.2f} MiB"
+              f"  streamed peak : {streamed / 2**20:8.2f} MiB ({elapsed:.3f}s)")
+
+
+def bench_projection(rows=200_000, columns=('Name', 'Student_Grade', 'Student_class_subject')):
+    sol = Solution()
+    data = distinct_list(rows)
+    for plan in (None, True):
+        full = best_of(lambda: sum(1 for _ in sol.iter_rows(data, cross_record_dedup=False, plan=plan)))
+        narrow = best_of(lambda: sum(1 for _ in sol.iter_rows(data, cross_record_dedup=False, plan=plan,
+                                                              columns=columns)))
+        print(f"{rows:>9} rows  plan={plan!s:5}  all columns : {full:.3f}s"
+              f"  {len(columns)} columns : {narrow:.3f}s ({full / narrow:.2f}x)")
+    top = best_of(lambda: sum(1 for _ in sol.iter_rows(data, cross_record_dedup=False, columns=['Name'])))
+    print(f"{rows:>9} rows  Name only (nested lists pruned) : {top:.3f}s")
+
+
+def wide_docs(records, columns, present=5, seed=0):
+    # Records carrying only a few of many possible Student_class_* columns.
+    r = random.Random(seed)
+    names = [f"f{i}" for i in range(columns)]
+    docs = [{'Name': f"name {n}",
+             'Student': [{'class': [{k: 'v' for k in r.sample(names, present)} for _ in range(4)]} for _ in range(3)]}
+            for n in range(records)]
+    final_dict = dict.fromkeys(['Name'] + [f"Student_class_{k}" for k in names], '')
+    return docs, final_dict
+
+
+def bench_backfill(records=300, widths=(10, 100, 300, 1000)):
+    sol = normalize_dictionary_with_missing_keys.Solution()
+    for columns in widths:
+        docs, final_dict = wide_docs(records, columns)
+        elapsed = best_of(lambda: sol._recursive_parse_data(docs, {}, [], final_dict), repeat=1)
+        print(f"{columns:>5} final_dict columns  normalize : {elapsed:.3f}s")
+
+
+def bench_discovery(records=(1000, 10_000), sample=100):
+    sol = normalize_dictionary_with_missing_keys.Solution()
+    for n in records:
+        docs = synthetic_docs(n, depth=3, fanout=3, sparsity=0.3, shape='cmdb')
+        full = best_of(lambda: sol.discover_columns(docs))
+        sampled = best_of(lambda: sol.discover_columns(docs, sample))
+        found = sol.discover_columns(docs)
+        print(f"{n:>9} records  {len(found)} columns  full pass : {full:.3f}s  first {sample} : {sampled:.4f}s"
+              f"  ({len(found) - len(sol.discover_columns(docs, sample))} columns missed by the sample)")
+
+
+def bench_reducers(records=500, remarks=2000):
+    docs = [{'Name': f"name {n}", 'Student': [{'Exam': n, 'remark': ['hari: PASS', 'meena: FAIL'] * (remarks // 2)}]}
+            for n in range(records)]
+    for name in normalize_dictionary_with_missing_keys.REDUCERS:
+        sol = normalize_dictionary_with_missing_keys.Solution(reducers={'Student_remark': name})
+        elapsed = best_of(lambda: sol._recursive_parse_data(docs, {}, [], {}))
+        print(f"{records} records x {remarks} remarks  {name:>6} : {elapsed:.3f}s")
+
+
+def bench_sparse_rows(rows=10_000, widths=(100, 1000), present=5):
+    # Backfilled rows as normalize builds them, kept as dicts or compacted.
+    r = random.Random(0)
+    for columns in widths:
+        final_dict = dict.fromkeys([f"col{i}" for i in range(columns)], '')
+
+        def dense_row():
+            row = {k: 'v' for k in r.sample(list(final_dict), present)}
+            row.update((k, '') for k in final_dict if k not in row)
+            return row
+
+        dense = peak_memory(lambda: [dense_row() for _ in range(rows)])
+        index = normalize_dictionary_with_missing_keys.ColumnIndex(final_dict)
+        sparse = peak_memory(lambda: [index.row(dense_row()) for _ in range(rows)])
+        print(f"{rows} rows x {columns} columns  dicts : {dense / 2**20:8.2f} MiB  sparse : {sparse / 2**20:8.2f} MiB"
+              f" ({dense / sparse:.0f}x smaller)")
+    docs, final_dict = wide_docs(300, 1000)
+    sol = normalize_dictionary_with_missing_keys.Solution()
+    dense = peak_memory(lambda: sol._recursive_parse_data(docs, {}, [], final_dict))
+    sparse = peak_memory(lambda: sol._sparse_parse_data(docs, final_dict))
+    print(f"normalize wide_docs(300, 1000)  peak dicts : {dense / 2**20:.2f} MiB  sparse=True : {sparse / 2**20:.2f} MiB")
+
+
+# Synthetic documents: a node is (keys in document order, {nested key: child
+# node}). A child of None repeats its parent, so depth is open-ended.
+SHAPES = {
+    'list_': (('Name', 'Student'), {
+        'Student': (('Exam', 'Grade', 'remark', 'class'), {
+            'class': (('age', 'subject', 'class'), {'class': None}),
+        }),
+    }),
+    'cmdb': (('assetName', 'verumIdentifier', 'application', 'billToOrganization', 'deployment', 'platformCatalog'), {
+        'application': (('techGroupOwner', 'verumIdentifier', 'contact'), {
+            'contact': (('contactType', 'sid', 'verumIdentifier', 'contact'), {'contact': None}),
+        }),
+        'billToOrganization': (('costCenter', 'isPrimary', 'verumIdentifier', 'organization'), {
+            'organization': (('cioLOB', 'verumIdentifier', 'organization'), {'organization': None}),
+        }),
+    }),
+}
+
+
+def _leaf(r, key, n):
+    if key == 'remark':
+        return [f"{r.choice(('hari', 'bob', 'meena'))}: {r.choice(('PASS', 'FAIL'))}" for _ in range(r.randint(0, 3))]
+    if key == 'deployment':
+        return {'address': {'region': r.choice(('APAC', 'EMEA', 'NA')), 'verumIdentifier': str(r.randrange(10**5))},
+                'verumIdentifier': str(n)}
+    if key == 'platformCatalog':
+        return {'manufacturer': r.choice(('REDHAT', 'MICROSOFT')), 'verumIdentifier': str(r.randrange(10**5))}
+    if key in ('Exam', 'age'):
+        return r.randrange(100)
+    return f"{key}-{n}-{r.randrange(1000)}"
+
+
+def synthetic_docs(records, depth=3, fanout=2, sparsity=0.0, shape='list_', seed=0):
+    """records top-level documents, depth levels deep with fanout elements
+    per nested list. Each scalar key is left out with probability sparsity."""
+    r = random.Random(seed)
+    counter = iter(range(1 << 62))
+
+    def build(node, level):
+        keys, children = node
+        doc = {}
+        for key in keys:
+            if key in children:
+                if level + 1 < depth:
+                    child = children[key] or node
+                    doc[key] = [build(child, level + 1) for _ in range(fanout)]
+            elif not sparsity or r.random() >= sparsity:
+                doc[key] = _leaf(r, key, next(counter))
+        return doc
+
+    return [build(SHAPES[shape], 0) for _ in range(records)]
+
+
+def synthetic_columns(depth=3, shape='list_'):
+    # Column paths the generator can produce, for the final_dict backfill.
+    columns = []
+
+    def walk(node, level, prefix):
+        keys, children = node
+        for key in keys:
+            if key not in children:
+                columns.append(prefix + key)
+            elif level + 1 < depth:
+                walk(children[key] or node, level + 1, prefix + key + '_')
+
+    walk(SHAPES[shape], 0, '')
+    return columns
+
+
+def load_dummy_data(name='normalize_dict'):
+    # "dummy data" runs a demo at import time, so only its functions and
+    # classes are taken out of the source. Returns None when pandas isn't installed.
+    try:
+        import numpy as np
+        import pandas as pd
+    except ImportError:
+        return None
+    with open(os.path.join(HERE, 'dummy data')) as fp:
+        tree = ast.parse(fp.read())
+    funcs = [node for node in tree.body if isinstance(node, (ast.FunctionDef, ast.ClassDef))]
+    namespace = {'pd': pd, 'np': np, 'itertools': itertools}
+    exec(compile(ast.Module(funcs, []), 'dummy data', 'exec'), namespace)
+    return namespace[name]
+
+
+def run_engine(engine, docs, depth, shape):
+    # Flattens docs with one engine, returns the number of rows.
+    if engine == 'iter_rows':
+        return sum(1 for _ in Solution().iter_rows(docs))
+    if engine == 'plan':
+        return sum(1 for _ in Solution().iter_rows(docs, plan=True))
+    if engine == 'normalize':
+        out = []
+        final_dict = dict.fromkeys(synthetic_columns(depth, shape), '')
+        normalize_dictionary_with_missing_keys.Solution()._recursive_parse_data(docs, {}, out, final_dict)
+        return len(out)
+    if engine in ('normalize_dict', 'normalize_dict_batched'):
+        normalize_dict = load_dummy_data(engine)
+        # One explode pass per nested level, as in "dummy data".
+        for level in range(depth - 1):
+            docs = [row for rows in normalize_dict(docs, level == 0) for row in rows]
+        return len(docs)
+    if engine == 'explode_normalize':
+        return len(load_dummy_data('explode_normalize')(docs))
+    raise ValueError("unknown engine %r" % engine)
+
+
+def measure_engine(engine, params):
+    # Runs in a fresh interpreter so ru_maxrss belongs to this engine alone.
+    docs = synthetic_docs(**params)
+    depth, shape = params.get('depth', 3), params.get('shape', 'list_')
+    if engine in PANDAS_ENGINES:
+        load_dummy_data()  # pandas' import isn't part of the engine's RSS
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    rows = run_engine(engine, docs, depth, shape)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    run_engine(engine, docs, depth, shape)
+    allocated = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # ru_maxrss is in KiB on Linux.
+    return {'rows': rows, 'seconds': elapsed, 'peak_rss_kib': peak_rss, 'rss_growth_kib': peak_rss - before,
+            'peak_alloc': allocated}
+
+
+ENGINES = ('iter_rows', 'plan', 'normalize', 'normalize_dict', 'normalize_dict_batched', 'explode_normalize')
+PANDAS_ENGINES = ('normalize_dict', 'normalize_dict_batched', 'explode_normalize')
+
+
+def bench_suite(records=(200, 1000), depths=(2, 3, 4), fanouts=(2, 3), sparsities=(0.0, 0.3),
+                shapes=('list_', 'cmdb'), engines=ENGINES, seed=0, timeout=120):
+    # Checked without importing pandas here: a forked child starts with the
+    # parent's RSS as its ru_maxrss.
+    if importlib.util.find_spec('pandas') is None:
+        print("pandas not installed, skipping", ", ".join(PANDAS_ENGINES))
+        engines = [e for e in engines if e not in PANDAS_ENGINES]
+    print(f"{'shape':>6} {'records':>7} {'depth':>5} {'fanout':>6} {'sparse':>6} {'engine':>22}"
+          f" {'rows':>8} {'rows/s':>10} {'RSS MiB':>8} {'+RSS MiB':>8} {'alloc MiB':>9}")
+    for shape in shapes:
+        for n in records:
+            for depth in depths:
+                for fanout in fanouts:
+                    for sparsity in sparsities:
+                        params = dict(records=n, depth=depth, fanout=fanout, sparsity=sparsity, shape=shape, seed=seed)
+                        for engine in engines:
+                            head = f"{shape:>6} {n:>7} {depth:>5} {fanout:>6} {sparsity:>6} {engine:>22}"
+                            try:
+                                proc = subprocess.run([sys.executable, os.path.abspath(__file__), 'engine', engine,
+                                                       json.dumps(params)], capture_output=True, text=True, cwd=HERE,
+                                                      timeout=timeout)
+                            except subprocess.TimeoutExpired:
+                                print(f"{head} timed out after {timeout}s")
+                                continue
+                            if proc.returncode:
+                                error = proc.stderr.strip().splitlines()[-1:] or ['?']
+                                print(f"{head} failed: {error[0]}")
+                                continue
+                            m = json.loads(proc.stdout.splitlines()[-1])
+                            print(f"{head} {m['rows']:>8} {m['rows'] / m['seconds']:>10.0f}"
+                                  f" {m['peak_rss_kib'] / 1024:>8.1f} {m['rss_growth_kib'] / 1024:>8.1f}"
+                                  f" {m['peak_alloc'] / 2**20:>9.2f}")
+
+
+def bench_path_cache(rows=200_000):
+    # Rows share one string per column path; stats=True shows the hit rate
+    # and what counting it costs.
+    data = distinct_list(rows)
+    for stats in (False, True):
+        paths = PathCache(stats=stats)
+        sol = Solution(paths)
+        elapsed = best_of(lambda: sum(1 for _ in sol.iter_rows(data)))
+        out = list(sol.iter_rows(data))
+        keys = len({id(k) for row in out for k in row})
+        print(f"{rows:>9} rows  stats={stats!s:5}  {elapsed:.3f}s  key objects : {keys}  {paths.cache_info()}")
+
+
+def bench_spill(rows=300_000, max_bytes=16 << 20):
+    # Streamed input, rows kept in a list or spilled past max_bytes.
+    sol = Solution()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'data.json')
+        with open(path, 'w') as fp:
+            json.dump(distinct_list(rows), fp)
+
+        def in_memory():
+            with open(path) as fp:
+                return list(sol.iter_json_rows(fp, cross_record_dedup=False))
+
+        def spilled():
+            with open(path) as fp:
+                with spill_rows(sol.iter_json_rows(fp, cross_record_dedup=False), max_bytes=max_bytes) as out:
+                    return sum(1 for _ in out)
+
+        listed = peak_memory(in_memory)
+        spill = peak_memory(spilled)
+        print(f"{rows:>9} rows  list peak : {listed / 2**20:8.2f} MiB  spill_rows(max_bytes={max_bytes >> 20} MiB)"
+              f" peak incl. read back : {spill / 2**20:8.2f} MiB")
+
+
+def exploding_asset(apps, contacts, bills, orgs):
+    # One CMDB asset whose sibling lists multiply out to
+    # apps * contacts * bills * orgs rows.
+    return {
+        'assetName': 'asset', 'verumIdentifier': '1',
+        'application': [{'techGroupOwner': f"team{a}", 'verumIdentifier': f"a{a}",
+                         'contact': [{'sid': f"s{c}", 'verumIdentifier': f"c{c}"} for c in range(contacts)]}
+                        for a in range(apps)],
+        'billToOrganization': [{'costCenter': f"cc{b}", 'verumIdentifier': f"b{b}",
+                                'organization': [{'cioLOB': f"lob{o}", 'verumIdentifier': f"o{o}"} for o in range(orgs)]}
+                               for b in range(bills)],
+        'deployment': {'address': {'region': 'APAC'}},
+    }
+
+
+def bench_explosion(sizes=((20, 5, 20, 5), (40, 10, 40, 10), (200, 20, 200, 20)), budget=100_000):
+    explode_normalize = load_dummy_data('explode_normalize')
+    if explode_normalize is None:
+        print("pandas not installed, skipping bench_explosion")
+        return
+    factor_row = load_dummy_data('factor_row')
+    flatten_record = load_dummy_data('flatten_record')
+    for apps, contacts, bills, orgs in sizes:
+        asset = exploding_asset(apps, contacts, bills, orgs)
+        rows = factor_row(flatten_record(asset), ('verumIdentifier',))
+        start = time.perf_counter()
+        size = rows.size()
+        counted = time.perf_counter() - start
+        line = f"{apps}x{contacts} apps, {bills}x{orgs} bills  {size:>9} rows  size() : {counted * 1000:.2f}ms"
+        if size <= budget:
+            full = peak_memory(lambda: explode_normalize([asset]))
+            line += f"  full peak : {full / 2**20:8.2f} MiB"
+        capped = peak_memory(lambda: explode_normalize([asset], budget=budget, overflow='branches'))
+        print(f"{line}  budget={budget} peak : {capped / 2**20:8.2f} MiB")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['engine']:
+        print(json.dumps(measure_engine(sys.argv[2], json.loads(sys.argv[3]))))
+        sys.exit()
+    if sys.argv[1:2] == ['suite']:
+        bench_suite()
+        sys.exit()
+    target = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    bench_engines(target)
+    bench_depth()
+    bench_dedup_scaling()
+    bench_streaming()
+    bench_plan()
+    bench_parallel()
+    bench_columnar()
+    bench_native()
+    bench_json_stream()
+    bench_projection()
+    bench_backfill()
+    bench_discovery()
+    bench_reducers()
+    bench_sparse_rows()
+    bench_path_cache()
+    bench_spill()
+    bench_explosion()
@@ -0,0 +1,72 @@
+from collections import namedtuple
+
+PathCacheInfo = namedtuple('PathCacheInfo', 'hits misses evictions maxsize currsize')
+
+
+class _CountedChildren(dict):
+    # Child table handed out when stats are on: every lookup is counted.
+    __slots__ = ('cache',)
+
+    def get(self, key, default=None):
+        self.cache.lookups += 1
+        return dict.get(self, key, default)
+
+
+class PathCache:
+    """Flattened column paths built once and shared by every row.
+
+    A path is parent + sep + key, or key itself at the top level. Paths
+    live in one table per parent, so a hot loop looks its parent's table up
+    once and then resolves each key with a plain dict lookup:
+
+        children = paths.children(key)
+        key_i = children.get(i) or paths.path(key, i)
+
+    At most maxsize paths are kept; past that the oldest parents' tables
+    are dropped. With stats=True cache_info() also counts hits, which costs
+    a Python-level call per lookup.
+    """
+
+    def __init__(self, maxsize=100_000, sep='_', stats=False):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.sep = sep
+        self.stats = stats
+        self.tables = {}
+        self.size = 0
+        self.lookups = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def children(self, parent):
+        table = self.tables.get(parent)
+        if table is None:
+            table = self.tables[parent] = _CountedChildren() if self.stats else {}
+            if self.stats:
+                table.cache = self
+        return table
+
+    def path(self, parent, key):
+        table = self.children(parent)
+        path = dict.get(table, key)
+        if path is None:
+            self.misses += 1
+            while self.size >= self.maxsize and self.tables:
+                oldest = next(iter(self.tables))
+                self.size -= len(self.tables.pop(oldest))
+                self.evictions += 1
+                table = self.children(parent)
+            path = parent + self.sep + key if parent else key
+            table[key] = path
+            self.size += 1
+        return path
+
+    def cache_info(self):
+        # hits is None unless lookups were counted (stats=True).
+        hits = self.lookups - self.misses if self.stats else None
+        return PathCacheInfo(hits, self.misses, self.evictions, self.maxsize, self.size)
+
+    def clear(self):
+        self.tables.clear()
+        self.size = 0
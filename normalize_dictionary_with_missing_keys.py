@@ -1,3 +1,10 @@
+import json
+import os
+from collections.abc import Mapping
+from operator import itemgetter
+
+from key_paths import PathCache
+
 list_ = [
     {'Name': 'Paras Jain',
   'Student': [{'Exam': 90,
@@ -16,8 +23,169 @@ list_ = [
  {'Name': 'Chunky Pandey'}
 ]
 
+def drop_suffix(suffix="PASS", sep='\n'):
+    """Reducer joining the items that don't end with suffix."""
+    def reduce(values):
+        return sep.join([v for v in values if not v.endswith(suffix)])
+    return reduce
+
+
+# Reducers turn a list of scalars into the value of its column. Register
+# new ones here by name, or pass any callable in Solution(reducers=...).
+REDUCERS = {
+    'filter': drop_suffix(),
+    'join': '\n'.join,
+    'count': len,
+    'first': itemgetter(0),
+    'last': itemgetter(-1),
+}
+
+
+class ColumnIndex:
+    """Column positions shared by every SparseRow of one output.
+
+    The first `width` columns are the final_dict ones, which read as ''
+    when a row doesn't store them; columns outside final_dict get a
+    position the first time a row has them.
+    """
+
+    def __init__(self, final_dict):
+        self.columns = list(final_dict)
+        self.positions = {k: p for p, k in enumerate(self.columns)}
+        self.width = len(self.columns)
+
+    def row(self, dict_):
+        # Compacts a backfilled row: only values that differ from the
+        # backfill are kept, in column order, with a bit set per position.
+        positions, width = self.positions, self.width
+        present = 0
+        items = []
+        for k, v in dict_.items():
+            p = positions.get(k)
+            if p is None:
+                p = positions[k] = len(self.columns)
+                self.columns.append(k)
+            elif p < width and v == '':
+                continue
+            present |= 1 << p
+            items.append((p, v))
+        items.sort()
+        return SparseRow(self, present, tuple(v for _, v in items), len(dict_))
+
+
+class SparseRow(Mapping):
+    """Read-only row backed by a ColumnIndex and a bitmap of stored values.
+
+    Iterates in column order; to_dict() gives a plain dict when needed.
+    """
+
+    __slots__ = ('_index', '_present', '_values', '_len')
+
+    def __init__(self, index, present, values, length):
+        self._index = index
+        self._present = present
+        self._values = values
+        self._len = length
+
+    def __getitem__(self, key):
+        p = self._index.positions.get(key)
+        if p is not None:
+            bit = 1 << p
+            if self._present & bit:
+                return self._values[bin(self._present & (bit - 1)).count('1')]
+            if p < self._index.width:
+                return ''
+        raise KeyError(key)
+
+    def __iter__(self):
+        present, width = self._present, self._index.width
+        for p, k in enumerate(self._index.columns):
+            if p < width or present >> p & 1:
+                yield k
+
+    def __len__(self):
+        return self._len
+
+    def __eq__(self, other):
+        if isinstance(other, SparseRow) and other._index is self._index:
+            return (self._present, self._values, self._len) == (other._present, other._values, other._len)
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        if len(other) != self._len:
+            return False
+        for k, v in self.items():
+            if k not in other or other[k] != v:
+                return False
+        return True
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def to_dict(self):
+        return dict(self.items())
+
+
+class _SparseOut(list):
+    # Output list for _sparse_parse_data: SparseRows up to `start`, then the
+    # current record's rows as dicts. `row in out` compares against the
+    # SparseRows through a hash of what they store, so the dedup scan stays
+    # a C-level list search over the dicts only.
+
+    def __init__(self, final_dict):
+        super().__init__()
+        self.index = ColumnIndex(final_dict)
+        self.final_dict = final_dict
+        self.start = 0
+        self.seen = {}
+
+    def _fingerprint(self, dict_):
+        final_dict = self.final_dict
+        return hash(frozenset((k, v) for k, v in dict_.items() if v != '' or k not in final_dict))
+
+    def __contains__(self, dict_):
+        if dict_ in self[self.start:]:
+            return True
+        # A SparseRow always has every final_dict column.
+        if not self.final_dict.keys() <= dict_.keys():
+            return False
+        return any(row == dict_ for row in self.seen.get(self._fingerprint(dict_), ()))
+
+    def compact(self):
+        rows = self[self.start:]
+        for n, dict_ in enumerate(rows):
+            row = rows[n] = self.index.row(dict_)
+            self.seen.setdefault(self._fingerprint(dict_), []).append(row)
+        self[self.start:] = rows
+        self.start = len(self)
+
+
 class Solution:
 
+    def __init__(self, reducers=None, default_reducer='filter', paths=None):
+        # reducers maps a column path to a reducer name or callable; other
+        # paths use default_reducer. Each path is resolved on first use.
+        self.reducers = dict(reducers or {})
+        self.default_reducer = default_reducer
+        self._resolved = {}
+        self.paths = PathCache() if paths is None else paths
+
+    def _reducer(self, key):
+        reducer = self.reducers.get(key, self.default_reducer)
+        if not callable(reducer):
+            reducer = REDUCERS[reducer]
+        self._resolved[key] = reducer
+        return reducer
+
+    def _backfill(self, dict_, final_dict):
+        # Missing final_dict columns go in as '' after the present ones, in
+        # final_dict order, without a Python-level loop over the columns.
+        # Leaves are always strings, so present columns stay as they are.
+        if final_dict.keys() <= dict_.keys():
+            return
+        filled = dict.fromkeys(final_dict, '')
+        filled.update(dict_)
+        dict_.update(filled)
+
     def _recursive_parse_data(self, val, dict_, out, final_dict, key=None):
         if isinstance(val, str):
             dict_[key] = val
@@ -26,7 +194,7 @@ class Solution:
             for rec in val:
                 if count > 0:
                     if dict_ not in out:
-                        [dict_.update({i: ''}) for i in final_dict.keys() if not dict_.get(i)]
+                        self._backfill(dict_, final_dict)
                         out.append(dict_)
                     if key:
                         dict_ = {k:v for k,v in dict_.items() if key not in k}
@@ -35,36 +203,136 @@ class Solution:
                 self._recursive_parse_data(rec, dict_, out, final_dict, key)
                 count += 1
             if dict_ not in out:
-                [dict_.update({i: ''}) for i in final_dict.keys() if not dict_.get(i)]
+                self._backfill(dict_, final_dict)
                 out.append(dict_)
         if isinstance(val, dict):
+            paths = self.paths
+            children = paths.children(key)
             for i in val.keys():
-                if key:
-                    key_i = key+"_"+i
-                else:
-                    key_i = i
+                key_i = children.get(i) or paths.path(key, i)
                 if val[i] and isinstance(val[i], list) and isinstance(val[i][0], dict):
                     self._recursive_parse_data(val[i], dict_, out, final_dict, key=key_i)
                 else:
                     if val[i] and isinstance(val[i], list):
-                        data = '\n'.join(i for i in val[i] if not i.endswith("PASS"))
+                        reducer = self._resolved.get(key_i) or self._reducer(key_i)
+                        data = reducer(val[i])
                     else:
                         data = val[i]
                     self._recursive_parse_data(str(data), dict_, out, final_dict, key=key_i)
 
 
-    def parseData(self, res):
+    def _discover_dict(self, val, node):
+        # node is [key order, {key: [is leaf, child node]}, {key: position}].
+        # A key first seen in a later record goes right after the key
+        # preceding it there, so the column order follows the records rather
+        # than discovery order. Positions are only rebuilt when a known key
+        # is looked up after such an insert, so known keys stay O(1).
+        order, fields, positions = node
+        prev = -1
+        for i, v in val.items():
+            field = fields.get(i)
+            if field is None:
+                field = fields[i] = [False, None]
+                prev += 1
+                if prev == len(order):
+                    positions[i] = prev
+                else:
+                    positions.clear()
+                order.insert(prev, i)
+            else:
+                if len(positions) != len(order):
+                    positions.update((k, p) for p, k in enumerate(order))
+                prev = positions[i]
+            if v and isinstance(v, list) and isinstance(v[0], dict):
+                if field[1] is None:
+                    field[1] = [[], {}, {}]
+                self._discover_list(v, field[1], field)
+            else:
+                field[0] = True
+
+    def _discover_list(self, val, node, field):
+        for rec in val:
+            if isinstance(rec, dict):
+                self._discover_dict(rec, node)
+            elif isinstance(rec, list):
+                self._discover_list(rec, node, field)
+            elif isinstance(rec, str) and field is not None:
+                field[0] = True
+
+    def _node_columns(self, node, key, columns):
+        order, fields = node[:2]
+        for i in order:
+            is_leaf, child = fields[i]
+            if key:
+                key_i = key+"_"+i
+            else:
+                key_i = i
+            if is_leaf:
+                columns[key_i] = ''
+            if child:
+                self._node_columns(child, key_i, columns)
+
+    def discover_columns(self, res, sample=None):
+        """Build final_dict from the data: every leaf column path in res, in
+        record order. sample=N only looks at the first N top-level records."""
+        node = [[], {}, {}]
+        if isinstance(res, dict):
+            self._discover_dict(res, node)
+        elif isinstance(res, list):
+            self._discover_list(res if sample is None else res[:sample], node, None)
+        columns = {}
+        self._node_columns(node, None, columns)
+        return columns
+
+    def load_columns(self, res, cache_path, sample=None):
+        """discover_columns, cached as a JSON list of columns in cache_path.
+        Later runs of the same feed read the file and skip discovery; delete
+        it when the feed gains columns."""
+        if os.path.exists(cache_path):
+            with open(cache_path) as fp:
+                return dict.fromkeys(json.load(fp), '')
+        columns = self.discover_columns(res, sample)
+        with open(cache_path, 'w') as fp:
+            json.dump(list(columns), fp)
+        return columns
+
+    def _sparse_parse_data(self, res, final_dict):
+        # The root loop of _recursive_parse_data, compacting the rows of each
+        # top-level record once the next one starts: nothing can write to
+        # them after that, so only one record's rows are ever full dicts.
+        out = _SparseOut(final_dict)
+        if not isinstance(res, list):
+            self._recursive_parse_data(res, {}, out, final_dict)
+            out.compact()
+            return list(out)
+        dict_ = {}
+        for count, rec in enumerate(res):
+            if count > 0:
+                if dict_ not in out:
+                    self._backfill(dict_, final_dict)
+                    out.append(dict_)
+                dict_ = {}
+                out.compact()
+            self._recursive_parse_data(rec, dict_, out, final_dict)
+        if dict_ not in out:
+            self._backfill(dict_, final_dict)
+            out.append(dict_)
+        out.compact()
+        return list(out)
+
+    def parseData(self, res, final_dict=None, schema_cache=None, sample=None, sparse=False):
         out = []
-        final_dict = {
-            'Name': '',
-            'Student_Exam': '',
-            'Student_Grade': '',
-            'Student_remark': '',
-            'Student_class_age': '',
-            'Student_class_subject': ''
-        }
-        self._recursive_parse_data(res, {}, out, final_dict)
+        if final_dict is None:
+            if schema_cache:
+                final_dict = self.load_columns(res, schema_cache, sample)
+            else:
+                final_dict = self.discover_columns(res, sample)
+        if sparse:
+            out = self._sparse_parse_data(res, final_dict)
+        else:
+            self._recursive_parse_data(res, {}, out, final_dict)
         print(out)
+        return out
 
 
 if __name__=="__main__":
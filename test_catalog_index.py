@@ -0,0 +1,133 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import catalog_index
+from catalog_index import CatalogIndex, build_index, resolve, write_index
+
+
+def random_paths(r, n):
+    segments = ['am', 'hello', 'aa', 'tt', 'ags', 'abc', 'x', 'é']
+    return ['.'.join(r.choice(segments) for _ in range(r.randint(1, 5))) for _ in range(n)]
+
+
+class TestFormat(unittest.TestCase):
+
+    def test_matches_a_set(self):
+        r = random.Random(0)
+        for n in (0, 1, 7, 500):
+            entries = random_paths(r, n)
+            index = CatalogIndex(build_index(entries))
+            catalog = set(entries)
+            self.assertEqual(list(index), list(dict.fromkeys(entries)))
+            self.assertEqual(len(index), len(catalog))
+            for path in random_paths(r, 200):
+                self.assertEqual(path in index, path in catalog)
+                parts = path.split('.')
+                prefixes = ['.'.join(parts[:i]) for i in range(1, len(parts) + 1)]
+                found = [p for p in prefixes if p in catalog]
+                self.assertEqual(index.ancestors(path), found)
+                self.assertEqual(index.longest_ancestor(path), found[-1] if found else None)
+
+    def test_rejects_other_data(self):
+        with self.assertRaises(ValueError):
+            CatalogIndex(b'NOTINDEX' + bytes(24))
+
+    def test_resolve_matches_in_memory_index(self):
+        r = random.Random(1)
+        entries = random_paths(r, 100)
+        jobs = ['t%02d.' % i + path for i, path in enumerate(random_paths(r, 300))]
+        index = CatalogIndex(build_index(entries))
+        expected = [index.longest_ancestor(job.split('.', 1)[-1]) for job in jobs]
+        self.assertEqual(resolve(jobs, entries, workers=1), expected)
+        self.assertEqual(resolve(jobs, entries, workers=2, chunk_size=64), expected)
+
+
+class TestChangeLog(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'catalog.idx')
+        write_index(['a', 'a.b'], self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def entries(self):
+        index = CatalogIndex.open(self.path)
+        try:
+            return sorted(index)
+        finally:
+            index.close()
+
+    def test_torn_last_line_is_skipped(self):
+        index = CatalogIndex.open(self.path)
+        index.add(['xyz.one'])
+        index.close()
+        with open(self.path + '.log', 'a') as fp:
+            fp.write('+xyz.lon')
+        self.assertEqual(self.entries(), ['a', 'a.b', 'xyz.one'])
+
+    def test_append_after_torn_line(self):
+        with open(self.path + '.log', 'w') as fp:
+            fp.write('+xyz.one\n+xyz.lon')
+        index = CatalogIndex.open(self.path)
+        index.add(['xyz.two'])
+        index.close()
+        self.assertEqual(self.entries(), ['a', 'a.b', 'xyz.one', 'xyz.two'])
+
+    def test_compact_keeps_other_handles_changes(self):
+        a = CatalogIndex.open(self.path)
+        b = CatalogIndex.open(self.path)
+        b.add(['from_b'])
+        b.remove(['a.b'])
+        a.add(['from_a'])
+        a.compact()
+        self.assertEqual(sorted(a), ['a', 'from_a', 'from_b'])
+        a.close()
+        b.close()
+        self.assertEqual(self.entries(), ['a', 'from_a', 'from_b'])
+
+    def test_auto_compact_keeps_other_handles_changes(self):
+        a = CatalogIndex.open(self.path)
+        b = CatalogIndex.open(self.path)
+        b.add(['from_b'])
+        added = ['x%d' % i for i in range(2000)]
+        a.add(added)
+        self.assertFalse(os.path.exists(self.path + '.log'))
+        a.close()
+        b.close()
+        self.assertEqual(self.entries(), sorted(['a', 'a.b', 'from_b'] + added))
+
+    def test_open_during_compaction(self):
+        # A reader that has mapped the index but not read its log yet must
+        # hold off compaction, or it finds the log gone and loses 'b'.
+        writer = CatalogIndex.open(self.path)
+        writer.add(['b'])
+        mapped, compacted = threading.Event(), threading.Event()
+        read_log = catalog_index._read_log
+        seen = []
+
+        def slow_read_log(path):
+            if threading.current_thread() is reader:
+                mapped.set()
+                compacted.wait(0.5)
+            return read_log(path)
+
+        reader = threading.Thread(target=lambda: seen.append(self.entries()))
+        with mock.patch('catalog_index._read_log', slow_read_log):
+            reader.start()
+            mapped.wait()
+            writer.compact()
+            compacted.set()
+            reader.join()
+        writer.close()
+        self.assertEqual(seen, [['a', 'a.b', 'b']])
+        self.assertEqual(self.entries(), ['a', 'a.b', 'b'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import importlib.util
+import unittest
+
+from flatten_benchmark import exploding_asset, load_dummy_data
+
+HAVE_PANDAS = importlib.util.find_spec('pandas') is not None
+
+
+@unittest.skipUnless(HAVE_PANDAS, "pandas not installed")
+class TestExplodeBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.explode_normalize = load_dummy_data('explode_normalize')
+
+    def test_under_budget_is_unchanged(self):
+        asset = exploding_asset(3, 2, 2, 2)
+        full = self.explode_normalize([asset])
+        self.assertEqual(len(full), 24)
+        capped = self.explode_normalize([asset], budget=24)
+        self.assertTrue(full.equals(capped))
+
+    def test_over_budget_raises(self):
+        with self.assertRaises(ValueError):
+            self.explode_normalize([exploding_asset(1, 1000, 1, 1)], budget=10)
+
+    def test_branches_still_capped(self):
+        # Per list column is 1001 rows here, more than the 1000 of the full
+        # explode, so it doesn't fit a budget the full explode misses.
+        for budget in (10, 999):
+            with self.assertRaises(ValueError):
+                self.explode_normalize([exploding_asset(1, 1000, 1, 1)], budget=budget, overflow='branches')
+        with self.assertRaises(ValueError):
+            self.explode_normalize([exploding_asset(1000, 1, 1000, 1)], budget=1000, overflow='branches')
+
+    def test_branches_are_marked(self):
+        small, big = exploding_asset(1, 1, 1, 1), exploding_asset(1000, 1, 1000, 1)
+        df = self.explode_normalize([small, big], budget=2000, overflow='branches')
+        self.assertEqual(len(df), 1 + 2000)
+        self.assertIsNone(df['_branch'][0])
+        self.assertEqual(df['_branch'][1:].value_counts().to_dict(),
+                         {'application': 1000, 'billToOrganization': 1000})
+        apps = df[df['_branch'] == 'application']
+        self.assertTrue(apps['costCenter'].isna().all())
+        self.assertTrue(apps['sid'].notna().all())
+
+    def test_no_marker_without_branches(self):
+        df = self.explode_normalize([exploding_asset(2, 2, 2, 2)], budget=100)
+        self.assertNotIn('_branch', df.columns)
+
+
+@unittest.skipUnless(HAVE_PANDAS, "pandas not installed")
+class TestNormalizeDictBatched(unittest.TestCase):
+
+    def setUp(self):
+        self.normalize_dict = load_dummy_data('normalize_dict')
+        self.batched = load_dummy_data('normalize_dict_batched')
+
+    def test_matches_normalize_dict(self):
+        assets = [exploding_asset(2, 2, 2, 1), exploding_asset(2, 2, 2, 1), exploding_asset(1, 3, 2, 2)]
+        self.assertEqual(self.batched(assets, True, chunk_size=2), self.normalize_dict(assets, True))
+
+    def test_record_without_list_is_rejected(self):
+        assets = [exploding_asset(1, 1, 1, 1), {'assetName': 'bare', 'verumIdentifier': '2'}]
+        with self.assertRaisesRegex(ValueError, "record 1 has no list"):
+            self.batched(assets, True)
+
+    def test_missing_drop_column_is_rejected(self):
+        asset = exploding_asset(1, 1, 1, 1)
+        del asset['verumIdentifier']
+        for app in asset['application']:
+            del app['verumIdentifier']
+        with self.assertRaisesRegex(ValueError, "no 'verumIdentifier' column"):
+            self.batched([asset, dict(asset)], True)
+
+
+if __name__ == '__main__':
+    unittest.main()
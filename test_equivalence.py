@@ -0,0 +1,367 @@
+import copy
+import io
+import json
+import os
+import random
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import normalize_dictionary_with_missing_keys as normalize
+import parse_dictionary
+from parse_dictionary import Solution, _RowIndex
+
+KEYS = ['a', 'b', 'ab', 'Name', 'c', 'a_b', 'x']
+LEAVES = ['s', 'ab', 'PASS', 'x: PASS', 1, 2.5, True, None, [], ['p', 'q: PASS'], {}]
+
+
+def gen(r, depth=0):
+    # Random document mixing the shapes the engines special-case: scalars
+    # after nested lists, empty lists and dicts, keys that are substrings of
+    # other keys, lists of lists.
+    t = r.random()
+    if depth > 4 or t < 0.35:
+        return copy.deepcopy(r.choice(LEAVES))
+    if t < 0.7:
+        return {k: gen(r, depth + 1) for k in r.sample(KEYS, r.randint(0, 4))}
+    items = []
+    for _ in range(r.randint(0, 3)):
+        if r.random() < 0.2:
+            items.append(gen(r, depth + 1))
+        else:
+            items.append({k: gen(r, depth + 1) for k in r.sample(KEYS, r.randint(0, 3))})
+    return items
+
+
+def docs(n, seed):
+    r = random.Random(seed)
+    for _ in range(n):
+        doc = gen(r)
+        if r.random() < 0.5:
+            doc = [doc, gen(r)] * r.randint(1, 2)
+        yield doc
+
+
+def perturbed(n, seed):
+    # Lists of records shaped like parse_dictionary.list_, some changed so
+    # a compiled plan has to hand them back to the generic walk.
+    r = random.Random(seed)
+    for _ in range(n):
+        res = copy.deepcopy([r.choice(parse_dictionary.list_) for _ in range(r.randint(1, 6))])
+        for rec in res:
+            if r.random() < 0.3:
+                student = r.choice(rec['Student'])
+                student[r.choice(['Exam', 'class', 'new', 'remark'])] = gen(r, 3)
+        yield res
+
+
+def outcome(fn, *args, **kwargs):
+    # Rows with their column order, or the type of the exception raised.
+    try:
+        return [list(row.items()) for row in fn(*args, **kwargs)]
+    except Exception as e:
+        return type(e)
+
+
+def unordered(rows):
+    # SparseRows iterate in column order, not in the order columns were set.
+    return [dict(row) for row in rows] if isinstance(rows, list) else rows
+
+
+def recursive_rows(res):
+    out = []
+    Solution()._recursive_parse_data(res, {}, out)
+    return out
+
+
+class TestFlattenEngines(unittest.TestCase):
+
+    def check(self, res, **kwargs):
+        expected = outcome(recursive_rows, res)
+        self.assertEqual(outcome(lambda: Solution().iter_rows(res, **kwargs)), expected, res)
+
+    def test_iter_rows(self):
+        for res in docs(400, 1):
+            self.check(res)
+
+    def test_row_index_refresh(self):
+        # Rows written to after they were emitted must be re-fingerprinted.
+        refreshed = 0
+        for res in docs(400, 2):
+            index = _RowIndex()
+            rows = list(Solution()._iterative_parse_data(res, index=index))
+            self.assertEqual(outcome(lambda: rows), outcome(recursive_rows, res), res)
+            refreshed += index.refreshed
+        self.assertGreater(refreshed, 0)
+
+    def test_rows_come_out_before_the_walk_ends(self):
+        res = copy.deepcopy(parse_dictionary.list_)
+        rows = Solution().iter_rows(res)
+        first = next(rows)
+        # The second record hasn't been walked yet, so a change to it shows.
+        res[1]['Name'] = 'changed'
+        rest = list(rows)
+        self.assertEqual(first, recursive_rows(parse_dictionary.list_)[0])
+        self.assertEqual([first] + rest, recursive_rows(res))
+
+    def test_long_sibling_lists(self):
+        # Past two siblings, rows share the list's prefix fingerprint.
+        r = random.Random(13)
+        for _ in range(200):
+            res = [{'k': str(r.randint(0, 1)),
+                    'L': [{'a': str(r.randint(0, 2)),
+                           'M': [{'b': str(r.randint(0, 1))} for _ in range(r.randint(0, 5))],
+                           'c': str(r.randint(0, 1))}
+                          for _ in range(r.randint(3, 7))],
+                    'z': 'x'}
+                   for _ in range(r.randint(1, 3))]
+            self.check(res)
+
+    def test_plan(self):
+        planned = 0
+        for res in perturbed(300, 3):
+            plan = Solution().compile_plan(res) or Solution().compile_plan(parse_dictionary.list_)
+            planned += plan is not None
+            self.check(res, plan=plan)
+        self.assertGreater(planned, 0)
+
+    def test_plan_on_random_docs(self):
+        for res in docs(300, 4):
+            if isinstance(res, list) and res:
+                self.check(res, plan=True)
+
+    def test_plan_on_deep_records(self):
+        # Too deep to compile: plan=True falls back to the generic walk.
+        def deep(depth):
+            doc = {'n': 'leaf'}
+            for i in range(depth):
+                doc = {'n': str(i), 'k': [doc]}
+            return doc
+
+        for depth in (25, 40, 300):
+            res = [deep(depth), deep(depth)]
+            self.assertIsNone(Solution().compile_plan(res))
+            expected = list(Solution().iter_rows(res))
+            self.assertEqual(len(expected), 1)
+            self.assertEqual(list(Solution().iter_rows(res, plan=True)), expected)
+            if depth < 300:
+                # Pickling records to the workers recurses per level.
+                self.assertEqual(list(Solution().iter_rows(res, plan=True, workers=2)), expected)
+            fp = io.StringIO(json.dumps(res))
+            self.assertEqual(list(Solution().iter_json_rows(fp, plan=True)), expected)
+
+    def test_workers(self):
+        res = [doc for batch in perturbed(20, 5) for doc in batch]
+        self.check(res, workers=2, chunk_size=7)
+        self.check(res, workers=2, chunk_size=7, plan=True)
+
+    def test_merge_on_colliding_or_foreign_hashes(self):
+        # Rows whose hashes collide are compared in full; hashes from a
+        # worker with another str hash seed are recomputed.
+        for res in perturbed(50, 16):
+            probe, results, hashes = parse_dictionary._flatten_chunk(res, None)
+            colliding = [rows and [0] * len(rows) for rows in hashes]
+            for sent in ((probe, results, colliding), (probe + 1, results, colliding)):
+                future = mock.Mock(result=lambda: sent)
+                rows = Solution()._merge_chunk(res, future, parse_dictionary._MergeIndex(), True, False, None)
+                self.assertEqual(outcome(lambda: rows), outcome(recursive_rows, res), res)
+
+    def test_json_rows(self):
+        for res in docs(200, 6):
+            if isinstance(res, list):
+                fp = io.StringIO(json.dumps(res))
+                self.assertEqual(outcome(lambda: Solution().iter_json_rows(fp, read_size=16)),
+                                 outcome(recursive_rows, json.loads(json.dumps(res))), res)
+
+    def test_columns(self):
+        r = random.Random(14)
+        for res in perturbed(200, 14):
+            full = recursive_rows(res)
+            paths = sorted({k for row in full for k in row})
+            columns = r.sample(paths, r.randint(1, len(paths)))
+            rows = list(Solution().iter_rows(res, columns=columns))
+            self.assertLessEqual({k for row in rows for k in row}, set(columns))
+            self.assertEqual(rows, list(Solution().iter_rows(res, columns=columns, plan=True)), res)
+            # Nothing is pruned or dropped when every column is asked for.
+            self.check(res, columns=paths)
+
+
+def baseline_normalize(val, dict_, out, final_dict, reduce, key=None):
+    # normalize_dictionary_with_missing_keys' walk as it was first written,
+    # with the remark reducer passed in.
+    if isinstance(val, str):
+        dict_[key] = val
+    count = 0
+    if isinstance(val, list):
+        for rec in val:
+            if count > 0:
+                if dict_ not in out:
+                    [dict_.update({i: ''}) for i in final_dict.keys() if not dict_.get(i)]
+                    out.append(dict_)
+                if key:
+                    dict_ = {k:v for k,v in dict_.items() if key not in k}
+                else:
+                    dict_ = {}
+            baseline_normalize(rec, dict_, out, final_dict, reduce, key)
+            count += 1
+        if dict_ not in out:
+            [dict_.update({i: ''}) for i in final_dict.keys() if not dict_.get(i)]
+            out.append(dict_)
+    if isinstance(val, dict):
+        for i in val.keys():
+            if key:
+                key_i = key+"_"+i
+            else:
+                key_i = i
+            if val[i] and isinstance(val[i], list) and isinstance(val[i][0], dict):
+                baseline_normalize(val[i], dict_, out, final_dict, reduce, key=key_i)
+            else:
+                if val[i] and isinstance(val[i], list):
+                    data = reduce(val[i])
+                else:
+                    data = val[i]
+                baseline_normalize(str(data), dict_, out, final_dict, reduce, key=key_i)
+
+
+def drop_pass(values):
+    return '\n'.join(i for i in values if not i.endswith("PASS"))
+
+
+COLUMNS = ['a', 'b', 'ab', 'Name', 'c', 'a_b', 'x', 'a_a', 'b_c', 'a_b_c', 'ab_Name', 'x_a', 'c_x']
+
+
+class TestNormalizeVariants(unittest.TestCase):
+
+    def baseline(self, res, final_dict, reduce=drop_pass):
+        def run():
+            out = []
+            baseline_normalize(res, {}, out, final_dict, reduce)
+            return out
+        return outcome(run)
+
+    def final_dicts(self, seed):
+        r = random.Random(seed)
+        for res in docs(300, seed):
+            yield res, dict.fromkeys(r.sample(COLUMNS, r.randint(0, 6)), '')
+
+    def test_dense(self):
+        for res, final_dict in self.final_dicts(7):
+            def run():
+                out = []
+                normalize.Solution()._recursive_parse_data(res, {}, out, final_dict)
+                return out
+            self.assertEqual(outcome(run), self.baseline(res, final_dict), res)
+
+    def test_sparse(self):
+        for res, final_dict in self.final_dicts(8):
+            def run():
+                rows = normalize.Solution()._sparse_parse_data(res, final_dict)
+                for row in rows:
+                    self.assertEqual(row, row.to_dict())
+                return [row.to_dict() for row in rows]
+            self.assertEqual(unordered(outcome(run)), unordered(self.baseline(res, final_dict)), res)
+
+    def test_discovered_schema(self):
+        sol = normalize.Solution()
+        explicit = dict.fromkeys(['Name', 'Student_Exam', 'Student_Grade', 'Student_remark',
+                                  'Student_class_age', 'Student_class_subject'], '')
+        self.assertEqual(list(sol.discover_columns(normalize.list_)), list(explicit))
+        for res in docs(300, 9):
+            final_dict = sol.discover_columns(res)
+            expected = self.baseline(res, final_dict)
+            with redirect_stdout(io.StringIO()):
+                self.assertEqual(outcome(sol.parseData, res), expected, res)
+                self.assertEqual(unordered(outcome(sol.parseData, res, sparse=True)), unordered(expected), res)
+            if isinstance(expected, list):
+                # A bare string in the top-level list is stored under None,
+                # which has no column path to discover.
+                self.assertLessEqual({k for row in expected for k, _ in row} - {None}, set(final_dict), res)
+
+    def test_schema_cache(self):
+        sol = normalize.Solution()
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = os.path.join(tmp, 'columns.json')
+            for res in docs(50, 10):
+                columns = sol.discover_columns(res)
+                self.assertEqual(list(sol.load_columns(res, cache)), list(columns))
+                self.assertEqual(list(sol.load_columns([], cache)), list(columns))
+                os.remove(cache)
+
+    def test_discovered_column_order(self):
+        # A new key goes right after the key before it in its record.
+        def ordered_union(records):
+            order = []
+            for rec in records:
+                prev = -1
+                for k in rec:
+                    if k not in order:
+                        order.insert(prev + 1, k)
+                    prev = order.index(k)
+            return order
+
+        r = random.Random(15)
+        for _ in range(300):
+            keys = ['c%d' % i for i in range(r.randint(1, 30))]
+            records = [dict.fromkeys(r.sample(keys, r.randint(0, len(keys))), 'x') for _ in range(r.randint(1, 8))]
+            self.assertEqual(list(normalize.Solution().discover_columns(records)), ordered_union(records))
+
+    def normalized(self, sol, res, final_dict):
+        def run():
+            out = []
+            sol._recursive_parse_data(res, {}, out, final_dict)
+            return out
+        return outcome(run)
+
+    def test_reducers(self):
+        for default, reduce in (('filter', drop_pass), ('join', '\n'.join), ('count', len)):
+            sol = normalize.Solution(default_reducer=default)
+            for res, final_dict in self.final_dicts(11):
+                self.assertEqual(self.normalized(sol, res, final_dict),
+                                 self.baseline(res, final_dict, reduce), (default, res))
+
+    def test_reducers_by_column(self):
+        reducers = {'Name': 'first', 'a': 'last', 'x': 'count', 'a_b': drop_pass}
+        sol = normalize.Solution(reducers, 'join')
+        for res, final_dict in self.final_dicts(12):
+            self.assertEqual(self.normalized(sol, res, final_dict),
+                             self.baseline_by_column(res, final_dict, reducers, 'join'), res)
+
+    def baseline_by_column(self, res, final_dict, reducers, default):
+        # The baseline walk only knows one reducer, so tag each list with its
+        # column path first and pick the reducer from the tag.
+        def tag(val, key=None):
+            if isinstance(val, dict):
+                out = {}
+                for i, v in val.items():
+                    key_i = key + "_" + i if key else i
+                    if v and isinstance(v, list) and isinstance(v[0], dict):
+                        out[i] = tag(v, key_i)
+                    elif v and isinstance(v, list):
+                        out[i] = Tagged(v, key_i)
+                    else:
+                        out[i] = v
+                return out
+            if isinstance(val, list):
+                return [tag(v, key) for v in val]
+            return val
+
+        def reduce(values):
+            reducer = reducers.get(values.key, default)
+            if not callable(reducer):
+                reducer = normalize.REDUCERS[reducer]
+            return reducer(list(values))
+
+        return self.baseline(tag(res), final_dict, reduce)
+
+
+class Tagged(list):
+    # A scalar list remembering its column path.
+
+    def __init__(self, values, key):
+        super().__init__(values)
+        self.key = key
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import importlib.util
+import io
+import json
+import sys
+import unittest
+
+from parse_dictionary import Columns, Solution, iter_json_records, list_, spill_rows
+
+HAVE_PANDAS = importlib.util.find_spec('pandas') is not None
+
+
+class Trickle(io.RawIOBase):
+    # Binary stream handing out at most `step` bytes per read, like a pipe.
+
+    def __init__(self, data, step):
+        self.data = data
+        self.pos = 0
+        self.step = step
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        chunk = self.data[self.pos:self.pos + min(size, self.step)]
+        self.pos += len(chunk)
+        return chunk
+
+
+class TestIterJsonRecords(unittest.TestCase):
+
+    def test_multibyte_split_across_reads(self):
+        data = json.dumps(["€", 1, {"k": "ü€"}], ensure_ascii=False).encode()
+        for step in (1, 2, 3):
+            records = list(iter_json_records(Trickle(data, step), read_size=step))
+            self.assertEqual(records, ["€", 1, {"k": "ü€"}])
+
+    def test_bom_with_small_reads(self):
+        data = b'\xef\xbb\xbf' + json.dumps(list_).encode()
+        for read_size in (1, 2):
+            records = list(iter_json_records(Trickle(data, read_size), read_size=read_size))
+            self.assertEqual(records, list_)
+
+    def test_truncated_character_still_fails(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_records(Trickle('["€"]'.encode()[:-3], 1), read_size=1))
+
+    def test_rows_match_parse_data(self):
+        data = json.dumps(list_, ensure_ascii=False).encode()
+        sol = Solution()
+        self.assertEqual(list(sol.iter_json_rows(Trickle(data, 2), read_size=2)), list(sol.iter_rows(list_)))
+
+
+class TestParseDataSpill(unittest.TestCase):
+
+    def test_spill_without_cross_record_dedup(self):
+        res = list_ * 3
+        sol = Solution()
+        expected = list(sol.iter_rows(res, cross_record_dedup=False))
+        self.assertGreater(len(expected), len(sol.parseData(res)))
+        with sol.parseData(res, spill=True, max_bytes=1, cross_record_dedup=False) as out:
+            self.assertEqual(list(out), expected)
+
+    def test_spilled_keys_round_trip(self):
+        rows = [{None: 'a'}, {'a': 1, 'b': None}, {None: 'b'}]
+        with spill_rows(rows, max_bytes=1) as out:
+            self.assertEqual(out.spilled, len(rows))
+            self.assertEqual(list(out), rows)
+        with Solution().parseData(['a', 'b'], spill=True, max_bytes=1) as out:
+            self.assertEqual(list(out), [{None: 'a'}, {None: 'b'}])
+
+
+class TestDeepDocuments(unittest.TestCase):
+
+    def test_deeper_than_recursion_limit(self):
+        depth = sys.getrecursionlimit() + 100
+        doc = {'subject': 'leaf'}
+        for _ in range(depth):
+            doc = {'k': [doc, {'subject': 'sibling'}]}
+        rows = Solution().parseData(doc)
+        expected = [{'k_' * depth + 'subject': 'leaf'}]
+        expected += [{'k_' * n + 'subject': 'sibling'} for n in range(depth, 0, -1)]
+        self.assertEqual(rows, expected)
+
+
+@unittest.skipUnless(HAVE_PANDAS, "pandas not installed")
+class TestColumnsToPandas(unittest.TestCase):
+
+    def test_values_equal_across_types(self):
+        df = Columns([{'a': 1}, {'a': True}, {'a': 1.0}, {'b': 'x'}]).to_pandas()
+        self.assertEqual([(type(v), v) for v in df['a']],
+                         [(int, 1), (bool, True), (float, 1.0), (type(None), None)])
+
+    def test_strings_stay_categorical(self):
+        df = Solution().to_columns(list_).to_pandas()
+        self.assertEqual(df['Name'].dtype, 'category')
+        self.assertEqual(df['Name'].tolist(), [row.get('Name') for row in Solution().iter_rows(list_)])
+
+
+if __name__ == '__main__':
+    unittest.main()